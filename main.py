@@ -1,17 +1,254 @@
 # main.py
 import asyncio
+import concurrent.futures
+import functools
 import json
-from datetime import datetime
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass, field
 from decimal import Decimal
-from typing import Dict, Any, List, Tuple
+from hashlib import blake2b
 from pathlib import Path
-import concurrent.futures
+from typing import Dict, Any, List, Optional, Tuple
+import orjson
+from celery import group
+from celery.exceptions import TimeoutError as CeleryTimeoutError
+
+try:
+    import uvloop
+except ImportError:  # uvloop is not available on Windows
+    uvloop = None
 
-from services.models import LoanApplication, LoanStatus
+from services.models import LoanApplication
+from services.config import PROCESS_CONFIG
 from services.completeness import verify_completion
 from services.eligibility import evaluate_eligibility
-from services.reimbursement import prepare_reimbursement_agreement
-from process_logger import ProcessLogger
+from services.reimbursement import prepare_reimbursement_agreement, prepare_reimbursement_batch
+from process_logger import AsyncProcessLogger, now_iso
+
+log = logging.getLogger(__name__)
+
+# Shared pool for synchronous evaluation work and in-process service calls,
+# keeping them off the event loop; Celery results are waited for by _RESULT_WAITER
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(
+    max_workers=(os.cpu_count() or 1) * 4,
+    thread_name_prefix='loan'
+)
+
+# Task signatures are built once; each dispatch clones one with its payload
+_VERIFY = verify_completion.s()
+_CREDIT = evaluate_eligibility.s()
+_AGREEMENT = prepare_reimbursement_agreement.s()
+_AGREEMENT_BATCH = prepare_reimbursement_batch.s()
+
+@functools.lru_cache(maxsize=1)
+def _load_reimbursement_rules() -> Dict[str, Any]:
+    """Reimbursement verification rules, read from disk on first use only"""
+    with open('reimbursement_rules.json', 'r') as f:
+        return json.load(f)
+
+def _digest(data: Dict[str, Any]) -> str:
+    """Short content hash identifying a payload in the logs"""
+    return blake2b(orjson.dumps(data, default=str), digest_size=8).hexdigest()
+
+def _run_in_process(signature) -> Dict[str, Any]:
+    """Calls the task function behind a signature directly, skipping Celery"""
+    return signature.type.run(*signature.args, **signature.kwargs)
+
+def _resolve(future: asyncio.Future, value: Any = None, error: Optional[BaseException] = None):
+    """Completes a future unless its waiter gave up on it"""
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(value)
+
+class _ResultWaiter:
+    """
+    Owns every wait on a Celery result. A single daemon thread polls the
+    pending results and resolves their event-loop futures, so the loop never
+    makes a blocking backend call, no thread is held per task, and the result
+    backend (not thread-safe for rpc://) is only ever read from one thread.
+    """
+    def __init__(self, poll_interval: float = 0.02):
+        self.poll_interval = poll_interval
+        self._requests: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def wait(self, result, timeout: float) -> asyncio.Future:
+        """Future resolved with result.get(), or CeleryTimeoutError after timeout seconds"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='celery-results', daemon=True)
+                self._thread.start()
+        self._requests.put((result, future, loop, time.monotonic() + timeout))
+        return future
+
+    def _run(self):
+        pending = []
+        while True:
+            # Sleep on the request queue while nothing is pending
+            if not pending:
+                pending.append(self._requests.get())
+            while True:
+                try:
+                    pending.append(self._requests.get_nowait())
+                except queue.Empty:
+                    break
+            
+            still_pending = []
+            for request in pending:
+                result, future, loop, deadline = request
+                if future.done():
+                    continue
+                try:
+                    if result.ready():
+                        outcome = (result.get(), None)
+                    elif time.monotonic() >= deadline:
+                        outcome = (None, CeleryTimeoutError(f"Task {result.id} did not finish in time"))
+                    else:
+                        still_pending.append(request)
+                        continue
+                except Exception as e:
+                    outcome = (None, e)
+                try:
+                    loop.call_soon_threadsafe(_resolve, future, *outcome)
+                except RuntimeError:
+                    pass  # The waiting loop is already closed
+            pending = still_pending
+            if pending:
+                time.sleep(self.poll_interval)
+
+_RESULT_WAITER = _ResultWaiter()
+
+async def _await_result(result) -> Any:
+    """
+    Waits for a Celery AsyncResult or GroupResult without blocking the event
+    loop, failing after task_timeout_seconds.
+    """
+    return await _RESULT_WAITER.wait(result, PROCESS_CONFIG['task_timeout_seconds'])
+
+async def _run_task(signature, payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Dispatches a Celery task to its service worker and waits for the result
+    without blocking the event loop, so concurrent phases actually overlap.
+    With USE_CELERY off the task function runs on a worker thread instead.
+    """
+    if not PROCESS_CONFIG['use_celery']:
+        return await asyncio.get_running_loop().run_in_executor(
+            EXECUTOR, _run_in_process, signature.clone(args=(payload,))
+        )
+    return await _await_result(signature.clone(args=(payload,)).apply_async())
+
+async def _run_group(signatures: List[Any]) -> List[Dict[str, Any]]:
+    """
+    Dispatches independent task signatures as a single Celery group, paying one
+    broker round-trip for all of them, and awaits their results in order.
+    """
+    loop = asyncio.get_running_loop()
+    if not PROCESS_CONFIG['use_celery']:
+        return list(await asyncio.gather(*(
+            loop.run_in_executor(EXECUTOR, _run_in_process, signature) for signature in signatures
+        )))
+    return await _await_result(group(signatures).apply_async())
+
+async def _retry(attempts: int, base_delay: float):
+    """
+    Yields attempt numbers 1..attempts, sleeping with exponential backoff and
+    a little jitter before each retry so retries do not hammer the services.
+    """
+    for attempt in range(1, attempts + 1):
+        if attempt > 1:
+            await asyncio.sleep(base_delay * 2 ** (attempt - 2) + random.random() * 0.1)
+        yield attempt
+
+# Phase results; converted to dicts only when they are logged
+@dataclass(slots=True)
+class CreditResult:
+    meets_requirements: bool
+    credit_score: int = 0
+    dti_ratio: float = 0
+    evaluation_details: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+@dataclass(slots=True)
+class PropertyResult:
+    meets_requirements: bool
+    property_value: Optional[float] = None
+    location_assessment: Optional[str] = None
+    risk_assessment: str = 'High'
+    error: Optional[str] = None
+
+@dataclass(slots=True)
+class EligibilityResult:
+    is_eligible: bool
+    # None when the check was cancelled after the other one rejected
+    credit_evaluation: Optional[CreditResult]
+    property_evaluation: Optional[PropertyResult]
+
+@dataclass(slots=True)
+class AgreementVerification:
+    compliant: bool
+    reason: str
+    verification_details: Dict[str, bool] = field(default_factory=dict)
+
+@dataclass(slots=True)
+class ReimbursementResult:
+    status: str
+    notification: str
+    agreement_details: Dict[str, Any]
+
+def _assess_property(property_data: Dict[str, Any]) -> PropertyResult:
+    """
+    Property valuation and risk assessment. Synchronous so it can run on
+    EXECUTOR as it grows real scoring work.
+    """
+    # In real implementation, this would call a property evaluation service
+    return PropertyResult(
+        meets_requirements=True,
+        property_value=property_data['loan_amount'] * 1.2,
+        location_assessment='Favorable',
+        risk_assessment='Low'
+    )
+
+def _agreement_input(application: LoanApplication) -> Optional[Dict[str, Any]]:
+    """Batch pricing payload of an application, or None if it cannot be priced"""
+    if not application.loan_amount or not application.loan_duration_years:
+        return None
+    try:
+        return {
+            'application_id': application.application_id,
+            'loan_amount': float(application.loan_amount),
+            'loan_duration_years': int(application.loan_duration_years)
+        }
+    except (TypeError, ValueError):
+        return None
+
+@dataclass(slots=True)
+class _ProcessContext:
+    """Per-application state for one run through the process"""
+    application: LoanApplication
+    process_logger: AsyncProcessLogger
+    verification_attempts: int = 0
+    service_results: Optional[asyncio.Future] = None
+    # Completeness payload, built once from the application
+    loan_data: Optional[Dict[str, Any]] = None
+    # Float forms of the Decimal amounts, set once the application is complete
+    loan_amount_f: Optional[float] = None
+    monthly_income_f: Optional[float] = None
+    monthly_expenses_f: Optional[float] = None
+    # Agreement prepared ahead of time for a whole batch, if any
+    prepared_agreement: Optional[Dict[str, Any]] = None
+    # Fields shared by the eligibility and reimbursement payloads
+    base_data: Optional[Dict[str, Any]] = None
 
 class LoanApplicationProcessor:
     """
@@ -19,305 +256,401 @@ class LoanApplicationProcessor:
     1. Completeness verification loop
     2. Parallel eligibility checks (credit history and property evaluation)
     3. Reimbursement agreement handling
+    Per-application state lives in a _ProcessContext, so one processor can
+    handle many applications concurrently.
     """
-    def __init__(self):
-        self.application = None
-        self.current_status = None
-        self.process_logger = ProcessLogger(base_dir="loan_process_logs")
-        self.verification_attempts = 0
+    def __init__(self, auto_accept_review: bool = True, log_dir: str = "loan_process_logs"):
+        self.log_dir = Path(log_dir)
         self.MAX_VERIFICATION_ATTEMPTS = 3
+        self.REVIEW_TIMEOUT = PROCESS_CONFIG['review_timeout_seconds']
+        self.VERIFICATION_BACKOFF = PROCESS_CONFIG['verification_backoff_seconds']
+        self.auto_accept_review = auto_accept_review
+        self._review_futures: Dict[str, asyncio.Future] = {}
+        # Applications processed concurrently take turns at the terminal
+        self._prompt_lock = asyncio.Lock()
 
-    async def process_loan_application(self, loan_application: LoanApplication) -> Dict[str, Any]:
+    async def run_many(self, applications: List[LoanApplication], concurrency: int = 32) -> List[Dict[str, Any]]:
         """
-        Main processing method following BPMN diagram flow exactly.
+        Processes several applications concurrently, at most `concurrency` at a
+        time, and returns their summaries in input order.
         """
-        self.application = loan_application
-        
-        # Debug logging
-        print("DEBUG: Loan Application Object:")
-        print(f"DEBUG: Has loan_amount attribute: {hasattr(self.application, 'loan_amount')}")
-        if hasattr(self.application, 'loan_amount'):
-            print(f"DEBUG: loan_amount value: {self.application.loan_amount}")
-        print(f"DEBUG: Application vars: {vars(self.application)}")
+        semaphore = asyncio.Semaphore(concurrency)
+        agreements = await self.prepare_agreements(applications)
+
+        async def _process_one(application: LoanApplication, agreement: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.process_loan_application(application, agreement)
+
+        return await asyncio.gather(*(
+            _process_one(application, agreement)
+            for application, agreement in zip(applications, agreements)
+        ))
+
+    async def prepare_agreements(self, applications: List[LoanApplication]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Prepares the reimbursement agreements of several applications with a
+        single batch task, in input order. Agreements only depend on the
+        application data, so they can be priced before the applications are
+        processed and handed to process_loan_application. Completeness has not
+        been checked yet, so applications whose amount or duration cannot be
+        priced get None and are left to prepare their own agreement.
+        """
+        batch = [_agreement_input(application) for application in applications]
+        priceable = [loan_data for loan_data in batch if loan_data is not None]
+        if not priceable:
+            return [None] * len(applications)
+        agreements = iter(await _run_task(_AGREEMENT_BATCH, priceable))
+        return [None if loan_data is None else next(agreements) for loan_data in batch]
+
+    async def process_loan_application(self, loan_application: LoanApplication,
+                                       prepared_agreement: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Main processing method following BPMN diagram flow exactly. An agreement
+        from prepare_agreements can be passed in to skip preparing it again.
+        """
+        ctx = _ProcessContext(
+            application=loan_application,
+            process_logger=AsyncProcessLogger(base_dir=str(self.log_dir)),
+            prepared_agreement=prepared_agreement
+        )
+        ctx.loan_data = self._completeness_data(ctx)
         
-        # Log process initiation with proper string conversion of Decimal values
-        initial_log = {
-            "application_id": self.application.application_id,
-            "client_name": self.application.client_name,
-            "initial_timestamp": datetime.now().isoformat()
-        }
+        # Debug logging; the application is only copied when it will be shown
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Loan application: %s", asdict(ctx.application))
         
-        # Only add loan_amount if it exists
-        if hasattr(self.application, 'loan_amount'):
-            initial_log["loan_amount"] = str(self.application.loan_amount)
-            
-        self.process_logger.log_step(
+        # Log process initiation; the details are only built if the step is recorded
+        ctx.process_logger.log_step(
             "Loan Application Process Initiated",
-            initial_log
+            lambda: self._initial_log_details(ctx)
         )
 
         try:
             # Phase 1: Completeness Verification Loop (as per BPMN)
-            is_complete = await self._execute_completeness_loop()
+            is_complete = await self._execute_completeness_loop(ctx)
             if not is_complete:
-                return self._finalize_process("REJECTED_INCOMPLETE")
+                return await self._finalize_process(ctx, "REJECTED_INCOMPLETE")
+
+            # The amounts are validated now; convert them once for every later payload
+            ctx.loan_amount_f = float(ctx.application.loan_amount)
+            ctx.monthly_income_f = float(ctx.application.monthly_income)
+            ctx.monthly_expenses_f = float(ctx.application.monthly_expenses)
+            ctx.base_data = {
+                'application_id': ctx.application.application_id,
+                'loan_amount': ctx.loan_amount_f,
+                'loan_duration_years': ctx.application.loan_duration_years
+            }
 
             # Phase 2: Parallel Eligibility Evaluation (as per BPMN)
-            eligibility_result = await self._parallel_eligibility_evaluation()
-            if not eligibility_result['is_eligible']:
-                return self._finalize_process("REJECTED_INELIGIBLE")
+            eligibility_result = await self._parallel_eligibility_evaluation(ctx)
+            if not eligibility_result.is_eligible:
+                return await self._finalize_process(ctx, "REJECTED_INELIGIBLE")
 
             # Phase 3: Reimbursement Agreement (as per BPMN)
-            agreement_result = await self._handle_reimbursement_process()
+            agreement_result = await self._reimbursement_phase(ctx)
             
-            return self._finalize_process(agreement_result['status'])
+            return await self._finalize_process(ctx, agreement_result.status)
 
         except Exception as e:
-            print(f"DEBUG: Exception occurred: {type(e).__name__}: {str(e)}")
-            print(f"DEBUG: Exception location: {e.__traceback__.tb_frame.f_code.co_filename}:{e.__traceback__.tb_lineno}")
-            self.process_logger.log_step("Process Error", {
+            log.debug("Exception occurred: %s: %s", type(e).__name__, e, exc_info=True)
+            ctx.process_logger.log_step("Process Error", {
                 "error_type": type(e).__name__,
                 "error_message": str(e),
                 "error_location": f"{e.__traceback__.tb_frame.f_code.co_filename}:{e.__traceback__.tb_lineno}"
             })
-            return self._finalize_process("ERROR")
+            return await self._finalize_process(ctx, "ERROR")
 
-    async def _execute_completeness_loop(self) -> bool:
+    async def _execute_completeness_loop(self, ctx: _ProcessContext) -> bool:
         """
         Implements the completeness verification loop from BPMN diagram.
         Returns True if application is complete, False if max attempts reached.
         """
-        while self.verification_attempts < self.MAX_VERIFICATION_ATTEMPTS:
-            self.verification_attempts += 1
+        async for attempt in _retry(self.MAX_VERIFICATION_ATTEMPTS, self.VERIFICATION_BACKOFF):
+            ctx.verification_attempts = attempt
             
-            self.process_logger.log_step(
-                f"Completeness Verification Attempt {self.verification_attempts}"
+            ctx.process_logger.log_step(
+                f"Completeness Verification Attempt {attempt}"
             )
 
             # Verify completeness
-            verification_result = await self._verify_completeness()
+            verification_result = await self._verify_completeness(ctx, ctx.loan_data)
             
             if verification_result['is_complete']:
-                self.process_logger.log_step("Application Verified Complete", {
-                    "attempts": self.verification_attempts
+                ctx.process_logger.log_step("Application Verified Complete", {
+                    "attempts": attempt
                 })
                 return True
 
             # If not complete and attempts remain, request updates
-            if self.verification_attempts < self.MAX_VERIFICATION_ATTEMPTS:
-                await self._request_application_updates(verification_result['missing_fields'])
+            if attempt < self.MAX_VERIFICATION_ATTEMPTS:
+                await self._request_application_updates(ctx, verification_result['missing_fields'])
             else:
-                self.process_logger.log_step("Max Verification Attempts Reached", {
-                    "total_attempts": self.verification_attempts
+                ctx.process_logger.log_step("Max Verification Attempts Reached", {
+                    "total_attempts": attempt
                 })
                 return False
 
         return False
 
-    async def _parallel_eligibility_evaluation(self) -> Dict[str, Any]:
+    async def _parallel_eligibility_evaluation(self, ctx: _ProcessContext) -> EligibilityResult:
         """
         Implements parallel eligibility evaluation as shown in BPMN diagram.
         """
-        self.process_logger.log_step("Starting Parallel Eligibility Evaluation")
+        ctx.process_logger.log_step("Starting Parallel Eligibility Evaluation")
 
         try:
-            # Create tasks for parallel execution
-            tasks = [
-                self._verify_credit_history(),
-                self._evaluate_property()
-            ]
+            credit_data = self._credit_history_data(ctx)
+            log.debug("Credit history verification data: %s", credit_data)
 
-            # Execute tasks in parallel
-            results = await asyncio.gather(*tasks)
-            credit_result, property_result = results
+            # Credit history and agreement preparation only depend on application
+            # data, so both are sent to the workers as one group; the agreement
+            # result is picked up later by the reimbursement phase
+            signatures = [_CREDIT.clone(args=(credit_data,))]
+            if ctx.prepared_agreement is None:
+                signatures.append(_AGREEMENT.clone(args=(self._reimbursement_data(ctx),)))
+            ctx.service_results = asyncio.ensure_future(_run_group(signatures))
 
-            print("DEBUG: Credit Result:", credit_result)
-            print("DEBUG: Property Result:", property_result)
+            # Execute tasks in parallel; once either check rejects the application
+            # the other one cannot change the outcome, so it is cancelled
+            async with asyncio.TaskGroup() as tg:
+                credit_task = tg.create_task(self._verify_credit_history(ctx))
+                property_task = tg.create_task(self._evaluate_property(ctx))
+                for next_result in asyncio.as_completed([credit_task, property_task]):
+                    if not (await next_result).meets_requirements:
+                        credit_task.cancel()
+                        property_task.cancel()
+                        break
+
+            # A cancelled check was not evaluated and is reported as None
+            credit_result, property_result = (
+                None if task.cancelled() else task.result()
+                for task in (credit_task, property_task)
+            )
+
+            log.debug("Credit result: %s", credit_result)
+            log.debug("Property result: %s", property_result)
 
             # Combine results as per BPMN gateway
-            is_eligible = all([
-                credit_result['meets_requirements'],
-                property_result['meets_requirements']
-            ])
-
-            evaluation_details = {
-                "is_eligible": is_eligible,
-                "credit_evaluation": credit_result,
-                "property_evaluation": property_result
-            }
+            is_eligible = all(
+                result is not None and result.meets_requirements
+                for result in (credit_result, property_result)
+            )
+
+            evaluation_details = EligibilityResult(
+                is_eligible=is_eligible,
+                credit_evaluation=credit_result,
+                property_evaluation=property_result
+            )
 
-            self.process_logger.log_step("Eligibility Evaluation Complete", evaluation_details)
+            ctx.process_logger.log_step("Eligibility Evaluation Complete", asdict(evaluation_details))
             return evaluation_details
             
         except Exception as e:
-            print(f"DEBUG: Error in parallel evaluation: {type(e).__name__}: {str(e)}")
+            log.debug("Error in parallel evaluation: %s: %s", type(e).__name__, e)
             raise
 
-    async def _verify_credit_history(self) -> Dict[str, Any]:
+    async def _verify_credit_history(self, ctx: _ProcessContext) -> CreditResult:
         """
         Verifies credit history as shown in BPMN diagram.
         """
-        self.process_logger.log_step("Starting Credit History Verification")
+        ctx.process_logger.log_step("Starting Credit History Verification")
         
         try:
-            loan_data = {
-                'application_id': self.application.application_id,
-                'client_name': self.application.client_name,
-                'monthly_income': float(self.application.monthly_income),
-                'monthly_expenses': float(self.application.monthly_expenses),
-                'loan_amount': float(self.application.loan_amount),
-                'loan_duration_years': self.application.loan_duration_years
-            }
-            
-            print(f"DEBUG: Credit history verification data: {loan_data}")
-            
-            # Get result from eligibility service
-            service_result = evaluate_eligibility.apply(args=[loan_data]).get()
+            # Get result from eligibility service (first task of the group)
+            service_result = (await ctx.service_results)[0]
             
             # Ensure result has the required structure
-            result = {
-                'meets_requirements': service_result.get('is_eligible', False),
-                'credit_score': service_result.get('credit_score', 0),
-                'dti_ratio': service_result.get('dti_ratio', 0),
-                'evaluation_details': service_result
-            }
+            result = CreditResult(
+                meets_requirements=service_result.get('is_eligible', False),
+                credit_score=service_result.get('credit_score', 0),
+                dti_ratio=service_result.get('dti_ratio', 0),
+                evaluation_details=service_result
+            )
             
-            self.process_logger.log_step("Credit History Verification Complete", result)
+            ctx.process_logger.log_step("Credit History Verification Complete", asdict(result))
             return result
             
         except Exception as e:
-            print(f"DEBUG: Error in credit history verification: {type(e).__name__}: {str(e)}")
-            print(f"DEBUG: Application attributes: {vars(self.application)}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Error in credit history verification: %s: %s (application: %s)",
+                          type(e).__name__, e, asdict(ctx.application))
             # Return a failure result if there's an error
-            return {
-                'meets_requirements': False,
-                'error': str(e),
-                'evaluation_details': {}
-            }
+            return CreditResult(meets_requirements=False, error=str(e))
 
-    async def _evaluate_property(self) -> Dict[str, Any]:
+    def _initial_log_details(self, ctx: _ProcessContext) -> Dict[str, Any]:
+        """
+        Details for the process initiation step; the logger encodes Decimal values itself.
+        """
+        return {
+            "application_id": ctx.application.application_id,
+            "client_name": ctx.application.client_name,
+            "initial_timestamp": now_iso(),
+            "loan_amount": ctx.application.loan_amount
+        }
+
+    def _credit_history_data(self, ctx: _ProcessContext) -> Dict[str, Any]:
+        """
+        Builds the eligibility service payload for the credit history check.
+        """
+        return {
+            **ctx.base_data,
+            'client_name': ctx.application.client_name,
+            'monthly_income': ctx.monthly_income_f,
+            'monthly_expenses': ctx.monthly_expenses_f
+        }
+
+    async def _evaluate_property(self, ctx: _ProcessContext) -> PropertyResult:
         """
         Evaluates property as shown in BPMN diagram.
         """
-        self.process_logger.log_step("Starting Property Evaluation")
+        ctx.process_logger.log_step("Starting Property Evaluation")
         
-        # Convert loan_amount to string before adding to property_data
-        loan_amount = str(self.application.loan_amount) if hasattr(self.application, 'loan_amount') else None
+        # Add safety check for loan_amount
+        if ctx.application.loan_amount is None:
+            return PropertyResult(meets_requirements=False, error='Missing loan amount')
         
         property_data = {
-            'application_id': self.application.application_id,
-            'property_description': self.application.property_description,
-            'loan_amount': loan_amount
+            **ctx.base_data,
+            'property_description': ctx.application.property_description
         }
         
-        # Add safety check for loan_amount
-        if not loan_amount:
-            return {
-                'meets_requirements': False,
-                'error': 'Missing loan amount',
-                'risk_assessment': 'High'
-            }
-        
         # Simulate property evaluation
         await asyncio.sleep(3)
         
-        # In real implementation, this would call a property evaluation service
-        evaluation_result = {
-            'meets_requirements': True,
-            'property_value': float(loan_amount) * 1.2,
-            'location_assessment': 'Favorable',
-            'risk_assessment': 'Low'
-        }
+        evaluation_result = await asyncio.get_running_loop().run_in_executor(
+            EXECUTOR, _assess_property, property_data
+        )
         
-        self.process_logger.log_step("Property Evaluation Complete", evaluation_result)
+        ctx.process_logger.log_step("Property Evaluation Complete", asdict(evaluation_result))
         return evaluation_result
 
-    async def _handle_reimbursement_process(self) -> Dict[str, Any]:
+    async def _reimbursement_phase(self, ctx: _ProcessContext) -> ReimbursementResult:
         """
-        Implements the reimbursement agreement process as shown in BPMN diagram.
+        Implements the reimbursement agreement process as shown in BPMN diagram:
+        insurance offer, agreement preparation and verification, and customer
+        review of a compliant agreement, handled in a single coroutine.
         """
-        self.process_logger.log_step("Starting Reimbursement Agreement Process")
+        ctx.process_logger.log_step("Starting Reimbursement Agreement Process")
         
-        # Check residency insurance interest
-        insurance_interest = await self._check_residency_insurance_interest()
-        if insurance_interest:
-            await self._send_insurance_details()
-        
-        # Prepare agreement and verify compliance
-        agreement_result = await self._prepare_reimbursement_agreement()
-        verification_result = await self._verify_reimbursement_agreement(agreement_result)
+        # The insurance offer does not affect the agreement, so the customer's
+        # answer and the agreement preparation/verification overlap; if either
+        # fails the other is cancelled before the process is finalized
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._insurance_offer(ctx))
+                agreement_task = tg.create_task(self._prepared_agreement(ctx))
+        except ExceptionGroup as eg:
+            raise eg.exceptions[0]
+        agreement_result, verification_result = agreement_task.result()
         
-        if verification_result['compliant']:
-            notification = "Application approved and verified! Agreement is complete."
-            final_status = "COMPLETED_APPLICATION"
+        if verification_result.compliant:
+            # Customer review of the verified agreement
+            ctx.process_logger.log_step("Awaiting Customer Review")
+            review_future = self._get_review_future(ctx.application.application_id)
+            if self.auto_accept_review and not review_future.done():
+                review_future.set_result(self._simulated_review())
+            try:
+                review_result = await asyncio.wait_for(review_future, timeout=self.REVIEW_TIMEOUT)
+            finally:
+                self._review_futures.pop(ctx.application.application_id, None)
+            ctx.process_logger.log_step("Customer Review Complete", review_result)
+            
+            if review_result['status'] == 'AGREEMENT_ACCEPTED':
+                notification = "Application approved and verified! Agreement is complete."
+                final_status = "COMPLETED_APPLICATION"
+            else:
+                notification = "Agreement declined by the customer."
+                final_status = "AGREEMENT_REJECTED"
         else:
-            notification = f"Agreement verification failed: {verification_result['reason']}"
+            notification = f"Agreement verification failed: {verification_result.reason}"
             final_status = "REJECTED"
         
         # Log notification
-        self.process_logger.log_step("Notification Sent", {
+        ctx.process_logger.log_step("Notification Sent", {
             "message": notification,
             "status": final_status
         })
         
-        return {
-            "status": final_status,
-            "notification": notification,
-            "agreement_details": agreement_result.get('agreement_details', {})
-        }
+        return ReimbursementResult(
+            status=final_status,
+            notification=notification,
+            agreement_details=agreement_result.get('agreement_details', {})
+        )
+
+    async def _insurance_offer(self, ctx: _ProcessContext):
+        """
+        Offers residency insurance and sends the details if the client is interested.
+        """
+        if await self._check_residency_insurance_interest(ctx):
+            await self._send_insurance_details(ctx)
+
+    async def _prepared_agreement(self, ctx: _ProcessContext) -> Tuple[Dict[str, Any], AgreementVerification]:
+        """
+        Waits for the agreement dispatched alongside the credit check, unless one
+        was prepared with the batch, and verifies it.
+        """
+        agreement_result = ctx.prepared_agreement or (await ctx.service_results)[1]
+        ctx.process_logger.log_step("Reimbursement Agreement Prepared", agreement_result)
+        
+        verification_result = await self._verify_reimbursement_agreement(ctx, agreement_result)
+        return agreement_result, verification_result
 
-    async def _check_residency_insurance_interest(self) -> bool:
+    async def _check_residency_insurance_interest(self, ctx: _ProcessContext) -> bool:
         """
         Prompts user about residency insurance interest.
         """
-        self.process_logger.log_step("Checking Residency Insurance Interest")
+        ctx.process_logger.log_step("Checking Residency Insurance Interest")
         
-        while True:
-            response = input("\nWould you be interested in residency insurance? (yes/no): ").lower()
-            if response in ['yes', 'no']:
-                result = response == 'yes'
-                self.process_logger.log_step("Residency Insurance Response", {
-                    "interested": result
-                })
-                return result
-            print("Please answer 'yes' or 'no'")
+        # Waiting on stdin happens on the loop's default pool, leaving EXECUTOR
+        # free and the loop running other applications; the lock keeps each
+        # question and its answers together when several applications ask
+        loop = asyncio.get_running_loop()
+        prompt = (f"\n[{ctx.application.application_id}] "
+                  "Would you be interested in residency insurance? (yes/no): ")
+        async with self._prompt_lock:
+            while True:
+                try:
+                    response = (await loop.run_in_executor(None, input, prompt)).lower()
+                except EOFError:
+                    # No stdin to answer from (e.g. a worker process): not interested
+                    response = 'no'
+                if response in ['yes', 'no']:
+                    break
+                print("Please answer 'yes' or 'no'")
+        
+        result = response == 'yes'
+        ctx.process_logger.log_step("Residency Insurance Response", {
+            "interested": result
+        })
+        return result
 
-    async def _send_insurance_details(self):
+    async def _send_insurance_details(self, ctx: _ProcessContext):
         """
         Simulates sending insurance details to the client.
         """
-        self.process_logger.log_step("Sending Insurance Details", {
+        ctx.process_logger.log_step("Sending Insurance Details", {
             "insurance_package": "Standard Residency Coverage",
             "monthly_cost": "€45.00",
             "coverage_details": "Basic protection against fire, theft, and water damage"
         })
         await asyncio.sleep(1)  # Simulate sending delay
 
-    async def _prepare_reimbursement_agreement(self) -> Dict[str, Any]:
+    def _reimbursement_data(self, ctx: _ProcessContext) -> Dict[str, Any]:
         """
-        Prepares the reimbursement agreement document.
+        Builds the reimbursement service payload for the agreement.
         """
-        loan_data = {
-            'application_id': self.application.application_id,
-            'loan_amount': float(self.application.loan_amount),
-            'loan_duration_years': self.application.loan_duration_years
-        }
-        
-        result = prepare_reimbursement_agreement.apply(args=[loan_data]).get()
-        self.process_logger.log_step("Reimbursement Agreement Prepared", result)
-        return result
+        return ctx.base_data
 
-    async def _verify_reimbursement_agreement(self, agreement_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _verify_reimbursement_agreement(self, ctx: _ProcessContext, agreement_data: Dict[str, Any]) -> AgreementVerification:
         """
         Verifies if the reimbursement agreement meets all compliance requirements.
         Simulates checking against "accords de remboursement" database.
         """
-        self.process_logger.log_step("Verifying Reimbursement Agreement")
+        ctx.process_logger.log_step("Verifying Reimbursement Agreement")
         
         try:
             # Load verification rules
-            with open('reimbursement_rules.json', 'r') as f:
-                rules = json.load(f)
+            rules = _load_reimbursement_rules()
             
             # Extract agreement details
             monthly_payment = agreement_data['agreement_details']['monthly_payment']
@@ -328,102 +661,117 @@ class LoanApplicationProcessor:
             checks = {
                 "payment_schedule": monthly_payment <= rules['max_monthly_payment'],
                 "duration_valid": duration_years <= rules['max_duration_years'],
-                "repayment_ratio": total_repayment <= float(self.application.loan_amount) * rules['max_repayment_ratio']
+                "repayment_ratio": total_repayment <= ctx.loan_amount_f * rules['max_repayment_ratio']
             }
             
             is_compliant = all(checks.values())
             
-            result = {
-                "compliant": is_compliant,
-                "reason": "All verification checks passed" if is_compliant else "Failed compliance checks",
-                "verification_details": checks
-            }
+            result = AgreementVerification(
+                compliant=is_compliant,
+                reason="All verification checks passed" if is_compliant else "Failed compliance checks",
+                verification_details=checks
+            )
             
-            self.process_logger.log_step("Reimbursement Agreement Verification Complete", result)
+            ctx.process_logger.log_step("Reimbursement Agreement Verification Complete", asdict(result))
             return result
             
         except Exception as e:
-            print(f"Error in reimbursement verification: {str(e)}")
-            return {
-                "compliant": False,
-                "reason": f"Verification error: {str(e)}",
-                "verification_details": {}
-            }
+            log.warning("Error in reimbursement verification: %s", e, exc_info=True)
+            return AgreementVerification(compliant=False, reason=f"Verification error: {str(e)}")
 
-    async def _process_customer_review(self) -> Dict[str, Any]:
+    def submit_customer_review(self, application_id: str, review_result: Dict[str, Any]):
         """
-        Handles customer review of the reimbursement agreement as per BPMN.
+        Resolves the pending customer review of an application with the customer's
+        response, e.g. from a webhook or message consumer running on the same loop.
         """
-        self.process_logger.log_step("Awaiting Customer Review")
-        
-        # Simulate customer review time
-        await asyncio.sleep(5)
-        
-        # In real implementation, this would wait for customer response
-        # For simulation, we'll assume acceptance
-        review_result = {
+        self._get_review_future(application_id).set_result(review_result)
+
+    def _get_review_future(self, application_id: str) -> asyncio.Future:
+        if application_id not in self._review_futures:
+            self._review_futures[application_id] = asyncio.get_running_loop().create_future()
+        return self._review_futures[application_id]
+
+    def _simulated_review(self) -> Dict[str, Any]:
+        """
+        Customer response used when reviews are auto-accepted (simulation/tests).
+        """
+        return {
             'status': 'AGREEMENT_ACCEPTED',
             'customer_response': 'Accepted',
-            'response_date': datetime.now().isoformat()
+            'response_date': now_iso()
+        }
+
+    def _completeness_data(self, ctx: _ProcessContext) -> Dict[str, Any]:
+        """
+        Builds the completeness service payload. Built once per application and
+        kept on the context for every verification attempt and the summary.
+        """
+        return {
+            'application_id': ctx.application.application_id,
+            'client_name': ctx.application.client_name,
+            'address': ctx.application.address,
+            'email': ctx.application.email,
+            'phone': ctx.application.phone,
+            'loan_amount': str(ctx.application.loan_amount),  # Convert Decimal to string
+            'loan_duration_years': ctx.application.loan_duration_years,
+            'property_description': ctx.application.property_description,
+            'monthly_income': str(ctx.application.monthly_income),  # Convert Decimal to string
+            'monthly_expenses': str(ctx.application.monthly_expenses)  # Convert Decimal to string
         }
-        
-        self.process_logger.log_step("Customer Review Complete", review_result)
-        return review_result
 
-    async def _verify_completeness(self) -> Dict[str, Any]:
+    async def _verify_completeness(self, ctx: _ProcessContext, loan_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Verifies the completeness of the loan application using the verification service.
         Returns a dictionary with verification results.
         """
         try:
-            loan_data = {
-                'application_id': self.application.application_id,
-                'client_name': self.application.client_name,
-                'address': self.application.address,
-                'email': self.application.email,
-                'phone': self.application.phone,
-                'loan_amount': str(self.application.loan_amount),  # Convert Decimal to string
-                'loan_duration_years': self.application.loan_duration_years,
-                'property_description': self.application.property_description,
-                'monthly_income': str(self.application.monthly_income),  # Convert Decimal to string
-                'monthly_expenses': str(self.application.monthly_expenses)  # Convert Decimal to string
-            }
+            result = await _run_task(_VERIFY, loan_data)
             
-            result = verify_completion.apply(args=[loan_data]).get()
-            
-            self.process_logger.log_step("Completeness Verification Result", result)
+            # Only IDs and hashes on the hot path; full payloads at DEBUG
+            ctx.process_logger.log_step("Completeness Verification Result", {
+                "application_id": ctx.application.application_id,
+                "payload_hash": _digest(loan_data),
+                "is_complete": result['is_complete'],
+                "missing_fields": result['missing_fields']
+            })
+            ctx.process_logger.log_step(
+                "Completeness Verification Payload",
+                lambda: {"request": loan_data, "response": result},
+                level=logging.DEBUG
+            )
             return result
             
         except Exception as e:
-            print(f"DEBUG: Error in _verify_completeness: {type(e).__name__}: {str(e)}")
-            print(f"DEBUG: Loan data being prepared: {vars(self.application)}")
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Error in _verify_completeness: %s: %s (application: %s)",
+                          type(e).__name__, e, asdict(ctx.application))
             raise
 
-    async def _request_application_updates(self, missing_fields: List[str]):
+    async def _request_application_updates(self, ctx: _ProcessContext, missing_fields: List[str]):
         """
         Handles requesting updates for incomplete applications.
         In a real implementation, this would trigger notifications to the client.
         """
-        self.process_logger.log_step("Requesting Application Updates", {
+        ctx.process_logger.log_step("Requesting Application Updates", {
             "missing_fields": missing_fields
         })
         # Simulate waiting for updates
         await asyncio.sleep(1)
 
-    def _finalize_process(self, final_status: str) -> Dict[str, Any]:
+    async def _finalize_process(self, ctx: _ProcessContext, final_status: str) -> Dict[str, Any]:
         """
         Finalizes the loan application process with complete summary.
         """
         process_summary = {
-            "application_id": self.application.application_id,
+            "application_id": ctx.application.application_id,
             "final_status": final_status,
-            "client_name": self.application.client_name,
-            "loan_amount": str(self.application.loan_amount) if hasattr(self.application, 'loan_amount') else None,
-            "verification_attempts": self.verification_attempts,
-            "process_completion_time": datetime.now().isoformat()
+            "client_name": ctx.application.client_name,
+            "loan_amount": ctx.loan_data['loan_amount'],
+            "verification_attempts": ctx.verification_attempts,
+            "process_completion_time": now_iso()
         }
         
-        self.process_logger.finalize_process(final_status, process_summary)
+        await ctx.process_logger.afinalize_process(final_status, process_summary)
         return process_summary
 
 async def main():
@@ -450,14 +798,25 @@ async def main():
         
         print("\nLoan Application Process Completed")
         print("="*50)
-        print(json.dumps(result, indent=2))
+        print(orjson.dumps(result, default=str, option=orjson.OPT_INDENT_2).decode())
         print("\nDetailed logs available in:")
-        print(f"- Detailed logs: {processor.process_logger.detailed_logs_dir}")
-        print(f"- JSON logs: {processor.process_logger.json_logs_dir}")
+        print(f"- Detailed logs: {processor.log_dir / 'detailed_logs'}")
+        print(f"- JSON logs: {processor.log_dir / 'json_logs'}")
         
     except Exception as e:
         print(f"\nError during process execution: {str(e)}")
         raise
+    finally:
+        EXECUTOR.shutdown()
+
+def run_async(coro):
+    """
+    Runs a coroutine to completion on uvloop when it is installed,
+    falling back to the default asyncio event loop.
+    """
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_async(main())
\ No newline at end of file
@@ -1,14 +1,53 @@
-import json
+import asyncio
+import functools
 import logging
-from datetime import datetime
+import logging.handlers
+from datetime import datetime, timedelta
 import os
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Callable, Union
+from uuid import uuid4
 from decimal import Decimal
 
+import orjson
+
+# Step details may be given lazily as a callable so that building them is
+# skipped when the step's level is filtered out
+StepDetails = Union[Dict[str, Any], Callable[[], Dict[str, Any]]]
+
+def _json_default(obj: Any) -> Any:
+    """Encode values orjson does not serialize natively"""
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+# (second, formatted date/time) of the last now_iso() call
+_iso_second = (-1, "")
+
+def now_iso() -> str:
+    """
+    Return the current local time in ISO format with millisecond precision.
+    The date/time part is only formatted once per second.
+    """
+    global _iso_second
+    now = time.time()
+    second = int(now)
+    cached_second, formatted = _iso_second
+    if second != cached_second:
+        formatted = datetime.fromtimestamp(second).isoformat()
+        _iso_second = (second, formatted)
+    return f"{formatted}.{int((now - second) * 1000):03d}"
+
+@functools.lru_cache(maxsize=128)
+def _read_process_log(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a JSON log; keyed on mtime so a rewritten log is read again"""
+    return orjson.loads(Path(path).read_bytes())
+
 class ProcessLogger:
-    def __init__(self, base_dir: str = "logs"):
+    def __init__(self, base_dir: str = "logs", level: Union[int, str] = None):
         self.base_dir = Path(base_dir)
+        self.level = level if level is not None else os.getenv('PROCESS_LOG_LEVEL', 'INFO')
         self.base_dir.mkdir(exist_ok=True)
         
         # Create subdirectories for different log types
@@ -20,8 +59,12 @@ class ProcessLogger:
         # Initialize log handlers
         self._setup_logging()
         
+        # Kept as a datetime so the duration needs no ISO parsing; steps store
+        # seconds since the monotonic start and are only formatted when saved
+        self.start_time = datetime.now()
+        self._start_monotonic = time.monotonic()
         self.process_data = {
-            'start_time': datetime.now().isoformat(),
+            'start_time': self.start_time.isoformat(timespec='milliseconds'),
             'steps': [],
             'completion_status': None,
             'process_duration': None
@@ -29,7 +72,9 @@ class ProcessLogger:
 
     def _setup_logging(self):
         """Set up logging configuration"""
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # The random suffix keeps the logger and file names unique when several
+        # processes start in the same microsecond, in this or another worker
+        timestamp = f"{datetime.now():%Y%m%d_%H%M%S_%f}_{uuid4().hex[:8]}"
         
         # Create a formatter for detailed logs
         detailed_formatter = logging.Formatter(
@@ -40,66 +85,108 @@ class ProcessLogger:
         
         # Set up file handler for detailed logs
         detailed_log_file = self.detailed_logs_dir / f"loan_process_{timestamp}.log"
-        file_handler = logging.FileHandler(detailed_log_file, encoding='utf-8')
-        file_handler.setFormatter(detailed_formatter)
+        self._file_handler = logging.FileHandler(detailed_log_file, encoding='utf-8')
+        self._file_handler.setFormatter(detailed_formatter)
+        
+        # Buffer records so the file is written in batches rather than per step;
+        # errors are written through immediately
+        self._buffer_handler = logging.handlers.MemoryHandler(
+            capacity=64, flushLevel=logging.ERROR, target=self._file_handler
+        )
         
         # Configure logger
         self.logger = logging.getLogger(f"loan_process_{timestamp}")
-        self.logger.setLevel(logging.INFO)
-        self.logger.addHandler(file_handler)
+        self.logger.setLevel(self.level)
+        self.logger.addHandler(self._buffer_handler)
         
-        # Store the JSON log file path
+        # Store the JSON log file path; the full document is written on
+        # finalize, while steps are appended to an NDJSON journal as they happen
         self.json_log_file = self.json_logs_dir / f"loan_process_{timestamp}.json"
+        self.journal_file = self.json_logs_dir / f"loan_process_{timestamp}.ndjson"
+        self._journal = open(self.journal_file, 'ab')
+
+    def is_enabled_for(self, level: int) -> bool:
+        """Whether steps logged at the given level are recorded; none are once closed"""
+        return not self._journal.closed and self.logger.isEnabledFor(level)
 
-    def log_step(self, step: str, details: Dict[str, Any] = None):
+    def log_step(self, step: str, details: StepDetails = None, level: int = logging.INFO):
         """Log a process step with details"""
+        if not self.is_enabled_for(level):
+            return
+        self._write_steps([self._record_step(step, details, level)])
+
+    def _json_option(self) -> int:
+        """Compact JSON by default; indented when debugging"""
+        return orjson.OPT_INDENT_2 if self.logger.isEnabledFor(logging.DEBUG) else 0
+
+    def _record_step(self, step: str, details: StepDetails, level: int) -> Tuple[str, str, bytes, int]:
+        """
+        Add a step to the in-memory process data and return it ready for writing:
+        (step, details for the detailed log, journal line, level)
+        """
+        if callable(details):
+            details = details()
+        
         # Ensure details is a dictionary and handle None
         details = details or {}
         
-        # Convert any Decimal values to strings
-        details = self._convert_decimals(details)
-        
-        # Format details for readable logging
-        details_str = json.dumps(details, indent=2) if details else ""
-        separator = "="*80
-        
-        # Log to detailed log file
-        self.logger.info(
-            step,
-            extra={
-                'separator': f"{separator}\n{details_str}\n{separator}"
-            }
-        )
+        # Encode details once for both the detailed log and the journal; the
+        # encoder converts Decimal values on the fly, so details are stored as given
+        details_json = orjson.dumps(details, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+        if not details:
+            details_str = ""
+        elif self._json_option():
+            details_str = orjson.dumps(
+                details,
+                default=_json_default,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            ).decode()
+        else:
+            details_str = details_json.decode()
         
         # Store step data for JSON logging
+        t_rel = time.monotonic() - self._start_monotonic
         step_data = {
-            'timestamp': datetime.now().isoformat(),
+            't_rel': t_rel,
             'step': step,
             'details': details
         }
         self.process_data['steps'].append(step_data)
         
-        # Update JSON file after each step
-        self._save_json_log()
+        # Splice the encoded details into the journal line instead of encoding them again
+        journal_head = orjson.dumps({'t_rel': t_rel, 'step': step})[:-1]
+        journal_line = journal_head + b',"details":' + details_json + b'}\n'
+        return step, details_str, journal_line, level
 
-    def _convert_decimals(self, data: Any) -> Any:
-        """Recursively convert Decimal objects to strings in dictionaries and lists"""
-        if isinstance(data, dict):
-            return {k: self._convert_decimals(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [self._convert_decimals(item) for item in data]
-        elif isinstance(data, Decimal):
-            return str(data)
-        return data
+    def _write_steps(self, entries: List[Tuple[str, str, bytes, int]]):
+        """Write recorded steps to the detailed log and append them to the journal"""
+        separator = "="*80
+        
+        # Log to detailed log file
+        for step, details_str, _, level in entries:
+            self.logger.log(
+                level,
+                step,
+                extra={
+                    'separator': f"{separator}\n{details_str}\n{separator}"
+                }
+            )
+        
+        # One line per step, so each write costs the same however long the process runs
+        self._journal.write(b"".join(journal_line for _, _, journal_line, _ in entries))
+        self._journal.flush()
 
     def finalize_process(self, final_status: str, summary: Dict[str, Any] = None):
-        """Finalize the process log with summary information"""
+        """Finalize the process log with summary information, save it and close the log files"""
+        self._complete_process(final_status, summary)
+        self._save_and_close()
+
+    def _complete_process(self, final_status: str, summary: Dict[str, Any] = None):
+        """Record the completion status, duration and summary, and log the final step"""
+        end_time = self.start_time + timedelta(seconds=time.monotonic() - self._start_monotonic)
         self.process_data['completion_status'] = final_status
-        self.process_data['end_time'] = datetime.now().isoformat()
-        self.process_data['process_duration'] = (
-            datetime.fromisoformat(self.process_data['end_time']) -
-            datetime.fromisoformat(self.process_data['start_time'])
-        ).total_seconds()
+        self.process_data['end_time'] = end_time.isoformat(timespec='milliseconds')
+        self.process_data['process_duration'] = (end_time - self.start_time).total_seconds()
         
         if summary:
             self.process_data['summary'] = summary
@@ -113,19 +200,115 @@ class ProcessLogger:
                 'summary': summary
             }
         )
-        
-        # Final JSON save
+
+    def _save_and_close(self):
+        """Write the full JSON log, then release the log files"""
         self._save_json_log()
+        self.close()
+
+    def close(self):
+        """Release the detailed log file handlers and the step journal"""
+        self._journal.close()
+        # Closing the buffer flushes it to the file handler first
+        for handler in list(self.logger.handlers):
+            handler.close()
+            self.logger.removeHandler(handler)
+        self._file_handler.close()
+        # Each process has its own named logger; unregister it so long-running
+        # processors do not accumulate one logger per application
+        logging.Logger.manager.loggerDict.pop(self.logger.name, None)
 
     def _save_json_log(self):
         """Save the current process data to JSON file"""
-        # Convert any Decimal values before saving
-        process_data = self._convert_decimals(self.process_data)
-        with open(self.json_log_file, 'w', encoding='utf-8') as f:
-            json.dump(process_data, f, indent=2, ensure_ascii=False)
+        # Step timestamps are formatted here, once per step
+        process_data = {
+            **self.process_data,
+            'steps': [
+                {
+                    'timestamp': (self.start_time + timedelta(seconds=step_data['t_rel'])).isoformat(timespec='milliseconds'),
+                    'step': step_data['step'],
+                    'details': step_data['details']
+                }
+                for step_data in self.process_data['steps']
+            ]
+        }
+        # Decimal values are converted by the encoder as they are encountered
+        with open(self.json_log_file, 'wb') as f:
+            f.write(orjson.dumps(process_data, default=_json_default, option=self._json_option()))
 
     @staticmethod
     def load_process_log(json_file_path: str) -> Dict[str, Any]:
-        """Load and return a previously saved process log"""
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
\ No newline at end of file
+        """
+        Load and return a previously saved process log. Repeated loads of an
+        unchanged file return the same cached dict, so treat it as read-only.
+        """
+        return _read_process_log(str(json_file_path), os.stat(json_file_path).st_mtime_ns)
+
+
+class AsyncProcessLogger(ProcessLogger):
+    """
+    Process logger for use inside the event loop. log_step only records the
+    step and queues it; a background task drains the queue and writes each
+    batch of steps to the detailed log and journal on a worker thread, so
+    per-step disk I/O stays off the loop itself.
+    """
+    def __init__(self, base_dir: str = "logs", level: Union[int, str] = None, batch_size: int = 32):
+        super().__init__(base_dir, level)
+        self.batch_size = batch_size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._writer = None
+
+    def log_step(self, step: str, details: StepDetails = None, level: int = logging.INFO):
+        """Record a process step and queue it for writing"""
+        if not self.is_enabled_for(level):
+            return
+        entry = self._record_step(step, details, level)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. called from sync code): write immediately
+            self._write_steps([entry])
+            return
+        
+        self._queue.put_nowait(entry)
+        if self._writer is None:
+            self._writer = loop.create_task(self._drain())
+
+    async def _drain(self):
+        """Write queued steps in batches until cancelled"""
+        while True:
+            entries = [await self._queue.get()]
+            while len(entries) < self.batch_size and not self._queue.empty():
+                entries.append(self._queue.get_nowait())
+            try:
+                await asyncio.to_thread(self._write_steps, entries)
+            except Exception:
+                logging.getLogger(__name__).exception("Failed to write process log batch")
+            finally:
+                for _ in entries:
+                    self._queue.task_done()
+
+    async def afinalize_process(self, final_status: str, summary: Dict[str, Any] = None):
+        """
+        finalize_process for the event loop: once the queued steps are written,
+        the JSON log is encoded and saved and the files are closed on a worker thread.
+        """
+        self._complete_process(final_status, summary)
+        await self._stop_writer()
+        await asyncio.to_thread(self._save_and_close)
+
+    async def aclose(self):
+        """
+        Flush all queued steps, stop the background writer and close the log
+        files. Closing flushes the buffered detailed log, so it runs on a
+        worker thread too.
+        """
+        await self._stop_writer()
+        await asyncio.to_thread(self.close)
+
+    async def _stop_writer(self):
+        """Wait until every queued step is written, then stop the background writer"""
+        if self._writer is not None:
+            await self._queue.join()
+            self._writer.cancel()
+            self._writer = None
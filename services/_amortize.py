@@ -0,0 +1,42 @@
+"""
+Amortization kernels for the reimbursement service. Compiled with Numba when
+it is installed; otherwise the same functions run as plain Python.
+"""
+from typing import List, Sequence
+
+try:
+    import numpy as np
+    from numba import njit, vectorize
+except ImportError:  # numba is optional
+    np = None
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+@njit(cache=True)
+def monthly_payment(loan_amount: float, monthly_rate: float, num_payments: int) -> float:
+    """Annuity payment for a fixed-rate loan"""
+    factor = (1.0 + monthly_rate) ** num_payments
+    return loan_amount * monthly_rate * factor / (factor - 1.0)
+
+if np is not None:
+    @vectorize(['float64(float64, float64, int64)'], target='parallel', cache=True)
+    def _monthly_payment_ufunc(loan_amount, monthly_rate, num_payments):
+        factor = (1.0 + monthly_rate) ** num_payments
+        return loan_amount * monthly_rate * factor / (factor - 1.0)
+
+def monthly_payments(loan_amounts: Sequence[float], monthly_rate: float, num_payments: Sequence[int]) -> List[float]:
+    """Annuity payments for a batch of loans sharing one rate, in input order"""
+    if np is None:
+        return [monthly_payment(amount, monthly_rate, n) for amount, n in zip(loan_amounts, num_payments)]
+    return _monthly_payment_ufunc(
+        np.asarray(loan_amounts, dtype=np.float64),
+        monthly_rate,
+        np.asarray(num_payments, dtype=np.int64)
+    ).tolist()
+
+# Compile on import so the first task does not pay for it
+monthly_payment(1.0, 0.01, 12)
+monthly_payments([1.0], 0.01, [12])
@@ -1,12 +1,19 @@
 from celery import Celery
-from .models import LoanApplication, LoanStatus
-from .config import CELERY_CONFIG, LOAN_RULES
-import json
-from decimal import Decimal, InvalidOperation
+from .models import LoanStatus
+from .config import CELERY_CONFIG, LOAN_RULES, REQUIRED_FIELDS_SET
+import re
+
+__all__ = ['app', 'verify_completion']
 
 app = Celery('completeness_service')
 app.config_from_object(CELERY_CONFIG)
 
+# Plain decimal numbers with optional sign and exponent (no NaN/Infinity)
+_NUMERIC_RE = re.compile(r'\s*[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?\s*')
+_NUMERIC_FIELDS = ('loan_amount', 'monthly_income', 'monthly_expenses')
+# Durations are whole, positive numbers of years
+_DURATION_RE = re.compile(r'\s*\+?0*[1-9]\d*\s*')
+
 @app.task(name='verify_completion')
 def verify_completion(loan_data: dict) -> dict:
     """
@@ -18,7 +25,7 @@ def verify_completion(loan_data: dict) -> dict:
             'application_id': None,
             'is_complete': False,
             'missing_fields': ['All fields missing'],
-            'status': LoanStatus.INCOMPLETE.value
+            'status': LoanStatus.INCOMPLETE.label
         }
 
     # Get application_id first as it's needed for the response
@@ -26,24 +33,21 @@ def verify_completion(loan_data: dict) -> dict:
     
     # Check all required fields
     missing_fields = []
-    for field in LOAN_RULES['REQUIRED_FIELDS']:
-        if field not in loan_data or not loan_data[field]:
-            missing_fields.append(field)
+    if not REQUIRED_FIELDS_SET <= {key for key, value in loan_data.items() if value}:
+        # Only walk the ordered list when something is actually missing
+        missing_fields = [field for field in LOAN_RULES['REQUIRED_FIELDS'] if not loan_data.get(field)]
     
     # Validate numeric fields if present
-    try:
-        if 'loan_amount' in loan_data and loan_data['loan_amount']:
-            Decimal(str(loan_data['loan_amount']))
-        if 'monthly_income' in loan_data and loan_data['monthly_income']:
-            Decimal(str(loan_data['monthly_income']))
-        if 'monthly_expenses' in loan_data and loan_data['monthly_expenses']:
-            Decimal(str(loan_data['monthly_expenses']))
-    except (ValueError, TypeError, InvalidOperation):
+    duration = loan_data.get('loan_duration_years')
+    if (duration and not _DURATION_RE.fullmatch(str(duration))) or any(
+        value and not _NUMERIC_RE.fullmatch(str(value))
+        for value in map(loan_data.get, _NUMERIC_FIELDS)
+    ):
         missing_fields.append('Invalid numeric values')
 
     return {
         'application_id': application_id,
         'is_complete': len(missing_fields) == 0,
         'missing_fields': missing_fields,
-        'status': LoanStatus.COMPLETE.value if len(missing_fields) == 0 else LoanStatus.INCOMPLETE.value
+        'status': LoanStatus.COMPLETE.label if len(missing_fields) == 0 else LoanStatus.INCOMPLETE.label
     }
@@ -10,11 +10,36 @@ RABBITMQ_CONFIG: Dict[str, Any] = {
 
 CELERY_CONFIG: Dict[str, Any] = {
     'broker_url': f"amqp://{RABBITMQ_CONFIG['username']}:{RABBITMQ_CONFIG['password']}@{RABBITMQ_CONFIG['host']}:{RABBITMQ_CONFIG['port']}/",
-    'result_backend': 'rpc://',
-    'task_serializer': 'json',
-    'result_serializer': 'json',
-    'accept_content': ['json'],
+    # The orchestrator workflow runs its parallel steps as a chord only with a
+    # backend that stores results, e.g. redis://localhost:6379/0
+    'result_backend': os.getenv('CELERY_RESULT_BACKEND', 'rpc://'),
+    # msgpack keeps broker payloads compact; json is still accepted for
+    # messages produced by older clients
+    'task_serializer': 'msgpack',
+    'result_serializer': 'msgpack',
+    'accept_content': ['msgpack', 'json'],
     'task_track_started': True,
+    'task_acks_late': True,
+    # Each service worker consumes its own queue (see README)
+    'task_routes': {
+        'verify_completion': {'queue': 'completeness'},
+        'evaluate_eligibility': {'queue': 'eligibility'},
+        'prepare_reimbursement_agreement': {'queue': 'reimbursement'},
+        'prepare_reimbursement_batch': {'queue': 'reimbursement'},
+        'process_loan_batch': {'queue': 'orchestrator'},
+        'ensure_complete': {'queue': 'orchestrator'},
+        'prepare_agreement_if_eligible': {'queue': 'orchestrator'},
+        'combine_loan_results': {'queue': 'orchestrator'},
+    },
+}
+
+PROCESS_CONFIG: Dict[str, Any] = {
+    'review_timeout_seconds': float(os.getenv('REVIEW_TIMEOUT_SECONDS', 300)),
+    'verification_backoff_seconds': float(os.getenv('VERIFICATION_BACKOFF_SECONDS', 0.5)),
+    # Longest wait for a service task result before the dispatch fails
+    'task_timeout_seconds': float(os.getenv('TASK_TIMEOUT_SECONDS', 30)),
+    # Dispatch service tasks to Celery workers; otherwise they run in-process
+    'use_celery': os.getenv('USE_CELERY', 'true').lower() in ('1', 'true', 'yes'),
 }
 
 LOAN_RULES = {
@@ -27,4 +52,7 @@ LOAN_RULES = {
     'MAX_DTI_RATIO': 0.43,
     'MIN_INCOME_MULTIPLIER': 3,
     'MAX_LOAN_DURATION_YEARS': 30,
-}
\ No newline at end of file
+}
+
+# For set operations on the required fields; REQUIRED_FIELDS keeps the order
+REQUIRED_FIELDS_SET = frozenset(LOAN_RULES['REQUIRED_FIELDS'])
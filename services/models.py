@@ -1,22 +1,38 @@
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import Optional, Deque
+import time
 from decimal import Decimal
-from enum import Enum
+from enum import IntEnum
+from uuid import uuid4
 
-class LoanStatus(Enum):
-    RECEIVED = "RECEIVED"
-    INCOMPLETE = "INCOMPLETE"
-    COMPLETE = "COMPLETE"
-    UNDER_REVIEW = "UNDER_REVIEW"
-    APPROVED = "APPROVED"
-    REJECTED = "REJECTED"
-    PENDING_AGREEMENT = "PENDING_AGREEMENT"
-    AGREEMENT_ACCEPTED = "AGREEMENT_ACCEPTED"
-    AGREEMENT_REJECTED = "AGREEMENT_REJECTED"
-    FINALIZED = "FINALIZED"
+class LoanStatus(IntEnum):
+    RECEIVED = 0
+    INCOMPLETE = 1
+    COMPLETE = 2
+    UNDER_REVIEW = 3
+    APPROVED = 4
+    REJECTED = 5
+    PENDING_AGREEMENT = 6
+    AGREEMENT_ACCEPTED = 7
+    AGREEMENT_REJECTED = 8
+    FINALIZED = 9
 
-@dataclass
+    @property
+    def label(self) -> str:
+        """Status name used in service responses, logs and reports"""
+        return _LABELS[self]
+
+_LABELS = {status: status.name for status in LoanStatus}
+
+@dataclass(slots=True)
+class HistoryEntry:
+    timestamp: float  # Epoch seconds
+    status: LoanStatus
+    comment: Optional[str] = None
+
+@dataclass(slots=True)
 class LoanApplication:
     client_name: str
     address: str
@@ -27,17 +43,21 @@ class LoanApplication:
     property_description: str
     monthly_income: Decimal
     monthly_expenses: Decimal
-    application_id: str = field(default_factory=lambda: f"LOAN_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    # Random ids stay unique for applications created in the same second
+    application_id: str = field(default_factory=lambda: f"LOAN_{uuid4().hex[:12]}")
     status: LoanStatus = field(default=LoanStatus.RECEIVED)
     created_at: datetime = field(default_factory=datetime.now)
-    last_updated: datetime = field(default_factory=datetime.now)
-    history: List[Dict] = field(default_factory=list)
+    # Defaults to created_at, so a new application reads the clock once
+    last_updated: Optional[datetime] = None
+    # Only the most recent transitions are kept
+    history: Deque[HistoryEntry] = field(default_factory=lambda: deque(maxlen=32))
+
+    def __post_init__(self):
+        if self.last_updated is None:
+            self.last_updated = self.created_at
     
     def update_status(self, new_status: LoanStatus, comment: str = None):
+        now = time.time()
         self.status = new_status
-        self.last_updated = datetime.now()
-        self.history.append({
-            "timestamp": self.last_updated,
-            "status": new_status,
-            "comment": comment
-        })
\ No newline at end of file
+        self.last_updated = datetime.fromtimestamp(now)
+        self.history.append(HistoryEntry(now, new_status, comment))
\ No newline at end of file
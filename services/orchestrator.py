@@ -1,15 +1,116 @@
-from celery import chain
+from celery import Celery, chain, chord
+from decimal import Decimal
+from typing import List, Optional
 from .models import LoanApplication, LoanStatus
+from .config import CELERY_CONFIG, PROCESS_CONFIG
 from .completeness import verify_completion
 from .eligibility import evaluate_eligibility
-from .reimbursement import prepare_reimbursement_agreement
+from .reimbursement import prepare_reimbursement_agreement, prepare_reimbursement_batch
+
+app = Celery('orchestrator_service')
+app.config_from_object(CELERY_CONFIG)
+
+def _cents(amount: Optional[Decimal]) -> Optional[int]:
+    """Exact integer cents of a Decimal amount; missing amounts stay None"""
+    if amount is None:
+        return None
+    return int((amount * 100).to_integral_value())
+
+class IncompleteApplicationError(ValueError):
+    """Raised to stop the loan workflow when an application is incomplete"""
+
+@app.task(name='ensure_complete')
+def ensure_complete(completeness: dict, loan_data: dict) -> dict:
+    """
+    Gate between completeness verification and the parallel steps: passes the
+    loan data on when the application is complete, otherwise fails the workflow.
+    """
+    if not completeness['is_complete']:
+        raise IncompleteApplicationError(
+            f"Application {completeness['application_id']} is incomplete: "
+            f"{', '.join(completeness['missing_fields'])}"
+        )
+    return loan_data
+
+@app.task(name='prepare_agreement_if_eligible')
+def prepare_agreement_if_eligible(eligibility: dict, loan_data: dict) -> List[dict]:
+    """
+    Sequential stand-in for the chord header when the result backend cannot run
+    chords: prepares the agreement after the eligibility check, calling the
+    reimbursement function directly, and only for eligible applications.
+    Returns the [eligibility, agreement] pair combine_loan_results expects.
+    """
+    agreement = prepare_reimbursement_agreement.run(loan_data) if eligibility['is_eligible'] else None
+    return [eligibility, agreement]
+
+def _chords_allowed() -> bool:
+    """Whether the configured result backend can run chords (rpc:// cannot)"""
+    try:
+        app.backend.ensure_chords_allowed()
+    except NotImplementedError:
+        return False
+    return True
+
+@app.task(name='combine_loan_results')
+def combine_loan_results(results: List[dict]) -> dict:
+    """Merge the eligibility and agreement results into the final outcome"""
+    eligibility, agreement = results
+    if eligibility['is_eligible']:
+        status = agreement['status']
+        notification = "Application eligible, reimbursement agreement prepared."
+    else:
+        status = LoanStatus.REJECTED.label
+        notification = "Application rejected: eligibility requirements not met."
+    return {
+        'application_id': eligibility['application_id'],
+        'eligibility': eligibility,
+        'agreement': agreement if eligibility['is_eligible'] else None,
+        'status': status,
+        'notification': notification
+    }
+
+@app.task(name='process_loan_batch')
+def process_loan_batch(loans: List[dict]) -> List[dict]:
+    """
+    Run completeness, eligibility and agreement preparation for a batch of
+    applications inside one task, calling the service functions directly
+    instead of dispatching a task per step. Agreements for all eligible loans
+    are priced in one vectorized call. Outcomes follow input order.
+    
+    Money fields hold integer cents end to end: completeness only checks that
+    they are present and numeric and eligibility only compares ratios, so both
+    take them as they are, and agreements are priced and reported in cents.
+    """
+    outcomes = []
+    eligible = []
+    for loan_data in loans:
+        completeness = verify_completion.run(loan_data)
+        outcome = {
+            'application_id': loan_data.get('application_id'),
+            'completeness': completeness,
+            'status': LoanStatus.INCOMPLETE.label
+        }
+        if completeness['is_complete']:
+            eligibility = evaluate_eligibility.run(loan_data)
+            outcome['eligibility'] = eligibility
+            if eligibility['is_eligible']:
+                eligible.append((outcome, loan_data))
+            else:
+                outcome['status'] = LoanStatus.REJECTED.label
+        outcomes.append(outcome)
+    
+    if eligible:
+        agreements = prepare_reimbursement_batch.run([loan_data for _, loan_data in eligible], in_cents=True)
+        for (outcome, _), agreement in zip(eligible, agreements):
+            outcome['agreement'] = agreement
+            outcome['status'] = agreement['status']
+    return outcomes
 
 class LoanProcessOrchestrator:
     @staticmethod
-    def start_loan_process(loan_application: LoanApplication) -> dict:
-        """Orchestrate the entire loan application process as per BPMN diagram"""
-        # Convert loan application to dictionary for task processing
-        loan_data = {
+    def _loan_data(loan_application: LoanApplication) -> dict:
+        """Convert loan application to dictionary for task processing"""
+        return {
             'application_id': loan_application.application_id,
             'client_name': loan_application.client_name,
             'address': loan_application.address,
@@ -21,12 +122,49 @@ class LoanProcessOrchestrator:
             'monthly_income': float(loan_application.monthly_income),
             'monthly_expenses': float(loan_application.monthly_expenses)
         }
+
+    @staticmethod
+    def _batch_loan_data(loan_application: LoanApplication) -> dict:
+        """Like _loan_data, with the money fields as exact integer cents"""
+        return {
+            'application_id': loan_application.application_id,
+            'client_name': loan_application.client_name,
+            'address': loan_application.address,
+            'email': loan_application.email,
+            'phone': loan_application.phone,
+            'loan_amount': _cents(loan_application.loan_amount),
+            'loan_duration_years': loan_application.loan_duration_years,
+            'property_description': loan_application.property_description,
+            'monthly_income': _cents(loan_application.monthly_income),
+            'monthly_expenses': _cents(loan_application.monthly_expenses)
+        }
+
+    @staticmethod
+    def start_loan_process(loan_application: LoanApplication) -> dict:
+        """
+        Orchestrate the entire loan application process as per BPMN diagram.
+        When the result backend cannot run chords (e.g. the default rpc://),
+        the agreement is prepared after the eligibility check instead of alongside it.
+        """
+        loan_data = LoanProcessOrchestrator._loan_data(loan_application)
         
-        # Create processing workflow according to BPMN diagram
+        # Create processing workflow according to BPMN diagram. The agreement only
+        # needs the loan data, so it is prepared alongside the eligibility check
+        if _chords_allowed():
+            parallel_steps = chord(
+                [evaluate_eligibility.s(), prepare_reimbursement_agreement.s()],
+                combine_loan_results.s()
+            )
+        else:
+            parallel_steps = chain(
+                evaluate_eligibility.s(),
+                prepare_agreement_if_eligible.s(loan_data),
+                combine_loan_results.s()
+            )
         workflow = chain(
             verify_completion.s(loan_data),
-            evaluate_eligibility.s(),
-            prepare_reimbursement_agreement.s()
+            ensure_complete.s(loan_data),
+            parallel_steps
         )
         
         # Start the workflow
@@ -35,5 +173,31 @@ class LoanProcessOrchestrator:
         return {
             'application_id': loan_application.application_id,
             'task_id': result.id,
-            'status': LoanStatus.RECEIVED.value
-        }
\ No newline at end of file
+            'status': LoanStatus.RECEIVED.label
+        }
+
+    @staticmethod
+    def start_loan_batch(loan_applications: List[LoanApplication]) -> dict:
+        """
+        Orchestrate a batch of applications with a single process_loan_batch
+        task, paying one broker round-trip for the whole batch.
+        """
+        loan_data_list = [LoanProcessOrchestrator._batch_loan_data(application) for application in loan_applications]
+        result = process_loan_batch.apply_async((loan_data_list,))
+        
+        return {
+            'application_ids': [loan_data['application_id'] for loan_data in loan_data_list],
+            'task_id': result.id,
+            'status': LoanStatus.RECEIVED.label
+        }
+
+    @staticmethod
+    def run_loan_batch(loan_applications: List[LoanApplication]) -> List[dict]:
+        """
+        Process a batch and wait for its outcomes. With USE_CELERY off the batch
+        runs in the calling thread.
+        """
+        loan_data_list = [LoanProcessOrchestrator._batch_loan_data(application) for application in loan_applications]
+        if not PROCESS_CONFIG['use_celery']:
+            return process_loan_batch.run(loan_data_list)
+        return process_loan_batch.apply_async((loan_data_list,)).get(timeout=PROCESS_CONFIG['task_timeout_seconds'])
@@ -1,38 +1,83 @@
 from celery import Celery
 from .models import LoanStatus
 from .config import CELERY_CONFIG
+from ._amortize import monthly_payment as _monthly_payment, monthly_payments as _monthly_payments
+from typing import List
+import functools
+import time
 from datetime import datetime, timedelta
-from decimal import Decimal
 
 app = Celery('reimbursement_service')
 app.config_from_object(CELERY_CONFIG)
 
-@app.task(name='prepare_reimbursement_agreement')
-def prepare_reimbursement_agreement(loan_data: dict) -> dict:
-    """Prepare reimbursement agreement for approved loans"""
-    loan_amount = Decimal(str(loan_data['loan_amount']))
-    duration_years = int(loan_data['loan_duration_years'])
-    
-    # Simple interest rate calculation (in reality, would be more complex)
-    base_rate = Decimal('0.03')
-    risk_premium = Decimal('0.01')
-    annual_rate = base_rate + risk_premium
-    
-    # Calculate monthly payment (simplified)
-    monthly_rate = annual_rate / 12
+# Simple interest rate calculation (in reality, would be more complex)
+BASE_RATE = 0.03
+RISK_PREMIUM = 0.01
+ANNUAL_RATE = BASE_RATE + RISK_PREMIUM
+MONTHLY_RATE = ANNUAL_RATE / 12
+
+@functools.lru_cache(maxsize=64)
+def _annuity_factor(monthly_rate: float, num_payments: int) -> float:
+    """Monthly payment per unit borrowed; only a few rate/duration pairs occur"""
+    return _monthly_payment(1.0, monthly_rate, num_payments)
+
+@functools.lru_cache(maxsize=1)
+def _first_payment_date(minute: int) -> str:
+    # minute only keys the cache; the date is recomputed when it changes
+    return (datetime.now().replace(day=1) + timedelta(days=32)).replace(day=1).strftime('%Y-%m-%d')
+
+def _next_month_first() -> str:
+    """First day of next month as YYYY-MM-DD, computed at most once per minute"""
+    return _first_payment_date(int(time.time() // 60))
+
+def _agreement(application_id: str, loan_amount: float, duration_years: int, monthly_payment: float,
+               unit: str = '') -> dict:
+    """
+    Agreement response for one loan. Amounts are floats in euros, or integer
+    cents under *_cents keys when unit is '_cents'.
+    """
     num_payments = duration_years * 12
-    monthly_payment = loan_amount * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
-    
     return {
-        'application_id': loan_data['application_id'],
+        'application_id': application_id,
         'agreement_details': {
-            'loan_amount': float(loan_amount),
+            f'loan_amount{unit}': loan_amount,
             'duration_years': duration_years,
-            'annual_interest_rate': float(annual_rate),
-            'monthly_payment': float(monthly_payment),
+            'annual_interest_rate': ANNUAL_RATE,
+            f'monthly_payment{unit}': monthly_payment,
             'total_payments': num_payments,
-            'first_payment_date': (datetime.now().replace(day=1) + timedelta(days=32)).replace(day=1).strftime('%Y-%m-%d'),
-            'total_repayment': float(monthly_payment * num_payments)
+            'first_payment_date': _next_month_first(),
+            f'total_repayment{unit}': monthly_payment * num_payments
         },
-        'status': LoanStatus.PENDING_AGREEMENT.value
+        'status': LoanStatus.PENDING_AGREEMENT.label
     }
+
+@app.task(name='prepare_reimbursement_agreement')
+def prepare_reimbursement_agreement(loan_data: dict) -> dict:
+    """Prepare reimbursement agreement for approved loans"""
+    loan_amount = float(loan_data['loan_amount'])
+    duration_years = int(loan_data['loan_duration_years'])
+    
+    # Calculate monthly payment (simplified)
+    monthly_payment = loan_amount * _annuity_factor(MONTHLY_RATE, duration_years * 12)
+    return _agreement(loan_data['application_id'], loan_amount, duration_years, monthly_payment)
+
+@app.task(name='prepare_reimbursement_batch')
+def prepare_reimbursement_batch(loan_data_list: List[dict], in_cents: bool = False) -> List[dict]:
+    """
+    Prepare reimbursement agreements for a batch of loans in one task, computing
+    all monthly payments in a single vectorized call. Results follow input order.
+    With in_cents, loan amounts are integer cents and the agreements report
+    integer cents, each monthly payment rounded to the nearest cent.
+    """
+    convert = int if in_cents else float
+    loan_amounts = [convert(loan_data['loan_amount']) for loan_data in loan_data_list]
+    durations = [int(loan_data['loan_duration_years']) for loan_data in loan_data_list]
+    monthly_payments = _monthly_payments(loan_amounts, MONTHLY_RATE, [years * 12 for years in durations])
+    if in_cents:
+        monthly_payments = [round(monthly_payment) for monthly_payment in monthly_payments]
+    unit = '_cents' if in_cents else ''
+    return [
+        _agreement(loan_data['application_id'], loan_amount, duration_years, monthly_payment, unit)
+        for loan_data, loan_amount, duration_years, monthly_payment
+        in zip(loan_data_list, loan_amounts, durations, monthly_payments)
+    ]
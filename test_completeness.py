@@ -72,6 +72,29 @@ def test_invalid_numeric_values():
     if not result['is_complete']:
         print(f"Missing fields: {result['missing_fields']}")
 
+def test_invalid_loan_duration():
+    """Test loan durations that are not a whole, positive number of years"""
+    application_data = {
+        'application_id': 'TEST_DURATION_001',
+        'client_name': 'Alexandre Dubois',
+        'address': '25 Avenue Montaigne, 75008 Paris, France',
+        'email': 'alexandre.dubois@email.com',
+        'phone': '+33 6 12 34 56 78',
+        'loan_amount': 2500000,
+        'property_description': 'Appartement de luxe',
+        'monthly_income': 35000,
+        'monthly_expenses': 8000
+    }
+    
+    print("\nTesting invalid loan durations:")
+    for duration in ['25.5', '-5', '1e3', 'twenty']:
+        result = verify_completion.apply(args=[{**application_data, 'loan_duration_years': duration}]).get()
+        print(f"Duration {duration!r}: {result['missing_fields']}")
+        assert result['missing_fields'] == ['Invalid numeric values']
+    
+    result = verify_completion.apply(args=[{**application_data, 'loan_duration_years': 25}]).get()
+    assert result['is_complete']
+
 if __name__ == "__main__":
     print("Starting completeness service tests...")
     
@@ -79,5 +102,6 @@ if __name__ == "__main__":
     test_complete_application()
     test_incomplete_application()
     test_invalid_numeric_values()
+    test_invalid_loan_duration()
     
     print("\nCompleteness service tests completed.")
\ No newline at end of file
@@ -1,15 +1,28 @@
 # concurrent_test.py
 import asyncio
-import random
+import concurrent.futures
+import math
+import multiprocessing
+import os
 from datetime import datetime
 from decimal import Decimal
 from typing import List, Dict, Any
-import json
+import orjson
 from pathlib import Path
 import time
 
+import numpy as np
+
 from services.models import LoanApplication, LoanStatus
-from main import LoanApplicationProcessor
+from services.config import PROCESS_CONFIG
+from services.orchestrator import LoanProcessOrchestrator
+from main import LoanApplicationProcessor, run_async
+
+CENTS = Decimal('0.01')
+
+def _to_cents(value: float) -> Decimal:
+    """Converts a generated float amount to a Decimal rounded to cents"""
+    return Decimal.from_float(value).quantize(CENTS)
 
 class LoanApplicationGenerator:
     """
@@ -32,84 +45,171 @@ class LoanApplicationGenerator:
             "Villa contemporaine"
         ]
 
-    def generate_application(self, application_index: int) -> LoanApplication:
+    def generate_batch(self, n: int) -> List[LoanApplication]:
         """
-        Creates a unique loan application with randomized but realistic values.
-        Each application has different characteristics to test various scenarios.
+        Creates n unique loan applications with randomized but realistic values,
+        drawing every random value for the whole batch at once.
         """
-        # Generate a unique name combination
-        client_name = f"{random.choice(self.first_names)} {random.choice(self.last_names)}"
-        
-        # Create a realistic property description
-        property_type = random.choice(self.property_types)
-        city = random.choice(self.cities)
-        
-        # Generate realistic financial values with some variation
-        # Base loan amount between 200k and 800k for more realistic scenarios
-        base_loan_amount = Decimal(str(random.randint(200000, 800000)))
-        
-        # Monthly income that satisfies the income multiplier rule (loan_amount / annual_income <= 3)
-        min_annual_income = base_loan_amount / Decimal('3')
-        min_monthly_income = min_annual_income / Decimal('12')
-        
-        # Add some randomness to make each application unique but still eligible
-        monthly_income = min_monthly_income * Decimal(str(random.uniform(1.0, 1.5)))
-        monthly_expenses = monthly_income * Decimal(str(random.uniform(0.2, 0.35)))  # Keep DTI ratio reasonable
-        
-        return LoanApplication(
-            client_name=client_name,
-            address=f"{random.randint(1, 150)} Rue {random.choice(['de la Paix', 'Victor Hugo', 'Saint-Honoré'])}, {city}",
-            email=f"{client_name.lower().replace(' ', '.')}@email.com",
-            phone=f"+33 {random.randint(600000000, 699999999)}",
-            loan_amount=base_loan_amount,
-            loan_duration_years=random.choice([15, 20, 25, 30]),
-            property_description=f"{property_type} de {random.randint(60, 300)}m² à {city}",
-            monthly_income=monthly_income,
-            monthly_expenses=monthly_expenses
-        )
+        rng = np.random.default_rng()
+        
+        # One array per field. Base loan amounts between 200k and 800k; monthly
+        # income satisfies the income multiplier rule (loan_amount / annual_income <= 3)
+        # with some variation, and expenses keep the DTI ratio reasonable
+        loan_amounts = rng.integers(200000, 800000, n, endpoint=True)
+        monthly_incomes = loan_amounts / 36 * rng.uniform(1.0, 1.5, n)
+        monthly_expenses = monthly_incomes * rng.uniform(0.2, 0.35, n)
+        durations = rng.choice([15, 20, 25, 30], n)
+        first_names = rng.integers(0, len(self.first_names), n)
+        last_names = rng.integers(0, len(self.last_names), n)
+        cities = rng.integers(0, len(self.cities), n)
+        property_types = rng.integers(0, len(self.property_types), n)
+        streets = rng.choice(['de la Paix', 'Victor Hugo', 'Saint-Honoré'], n)
+        street_numbers = rng.integers(1, 150, n, endpoint=True)
+        phones = rng.integers(600000000, 699999999, n, endpoint=True)
+        surfaces = rng.integers(60, 300, n, endpoint=True)
+        
+        # The whole batch is created at the same moment
+        created_at = datetime.now()
+        applications = []
+        for i in range(n):
+            client_name = f"{self.first_names[first_names[i]]} {self.last_names[last_names[i]]}"
+            city = self.cities[cities[i]]
+            applications.append(LoanApplication(
+                client_name=client_name,
+                address=f"{street_numbers[i]} Rue {streets[i]}, {city}",
+                email=f"{client_name.lower().replace(' ', '.')}@email.com",
+                phone=f"+33 {phones[i]}",
+                loan_amount=Decimal(int(loan_amounts[i])),
+                loan_duration_years=int(durations[i]),
+                property_description=f"{self.property_types[property_types[i]]} de {surfaces[i]}m² à {city}",
+                monthly_income=_to_cents(monthly_incomes[i]),
+                monthly_expenses=_to_cents(monthly_expenses[i]),
+                created_at=created_at
+            ))
+        return applications
+
+async def _timed_process(processor: LoanApplicationProcessor, application: LoanApplication,
+                         prepared_agreement: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Processes a single loan application and tracks its execution time.
+    Returns detailed results including timing information.
+    """
+    start_time = time.time()
+    
+    try:
+        result = await processor.process_loan_application(application, prepared_agreement)
+        processing_time = time.time() - start_time
+        
+        return {
+            'application_id': application.application_id,
+            'client_name': application.client_name,
+            'loan_amount': str(application.loan_amount),
+            'status': result['final_status'],
+            'processing_time': processing_time,
+            'success': True
+        }
+    except Exception as e:
+        processing_time = time.time() - start_time
+        return {
+            'application_id': application.application_id,
+            'client_name': application.client_name,
+            'error': str(e),
+            'processing_time': processing_time,
+            'success': False
+        }
+
+def _process_slice(processor: LoanApplicationProcessor, applications: List[LoanApplication],
+                   agreements: List[Dict[str, Any]], concurrency: int) -> List[Dict[str, Any]]:
+    """
+    Worker process entry point: runs a slice of applications concurrently on
+    the worker's own event loop, at most `concurrency` at a time, and returns
+    their results in input order.
+    """
+    async def _run() -> List[Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def _bounded(application: LoanApplication, agreement: Dict[str, Any]):
+            async with semaphore:
+                return await _timed_process(processor, application, agreement)
+        
+        return await asyncio.gather(*(
+            _bounded(application, agreement) for application, agreement in zip(applications, agreements)
+        ))
+    
+    return run_async(_run())
 
 class ConcurrentProcessingTester:
     """
     Manages concurrent processing of multiple loan applications.
     Tracks performance metrics and ensures proper handling of parallel requests.
     """
-    def __init__(self, num_applications: int, batch_size: int = 50):
+    def __init__(self, num_applications: int, batch_size: int = 50, service_batch: bool = False):
         self.num_applications = num_applications
+        # Hand each batch to the process_loan_batch service task instead of
+        # running the full process per application
+        self.service_batch = service_batch
         self.batch_size = min(batch_size, num_applications)  # Ensure batch size doesn't exceed total applications
         self.generator = LoanApplicationGenerator()
+        # One processor for all applications; per-application state lives in
+        # its process context, so concurrent use is safe
+        self.processor = LoanApplicationProcessor()
+        # Without Celery the services run in this process, so on a multi-core
+        # host the applications are split into one slice per core, each run
+        # concurrently on a worker process's own event loop. Workers are
+        # spawned rather than forked so they do not inherit this process's threads.
+        self.workers = os.cpu_count() or 1
+        self.pool = None
+        if not PROCESS_CONFIG['use_celery'] and not service_batch and self.workers > 1:
+            self.pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
         self.results: List[Dict[str, Any]] = []
         self.start_time = None
         self.end_time = None
 
-    async def process_application(self, application: LoanApplication) -> Dict[str, Any]:
+    async def process_application(self, application: LoanApplication,
+                                  prepared_agreement: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         Processes a single loan application and tracks its execution time.
         Returns detailed results including timing information.
         """
-        processor = LoanApplicationProcessor()
+        return await _timed_process(self.processor, application, prepared_agreement)
+
+    async def process_batch_in_service(self, batch: List[LoanApplication]) -> List[Dict[str, Any]]:
+        """
+        Processes a whole batch with one process_loan_batch task. Every
+        application of the batch reports the batch's processing time.
+        """
         start_time = time.time()
         
         try:
-            result = await processor.process_loan_application(application)
+            outcomes = await asyncio.to_thread(LoanProcessOrchestrator.run_loan_batch, batch)
+        except Exception as e:
             processing_time = time.time() - start_time
-            
-            return {
+            return [
+                {
+                    'application_id': application.application_id,
+                    'client_name': application.client_name,
+                    'error': str(e),
+                    'processing_time': processing_time,
+                    'success': False
+                }
+                for application in batch
+            ]
+        
+        processing_time = time.time() - start_time
+        return [
+            {
                 'application_id': application.application_id,
                 'client_name': application.client_name,
                 'loan_amount': str(application.loan_amount),
-                'status': result['final_status'],
+                'status': outcome['status'],
                 'processing_time': processing_time,
                 'success': True
             }
-        except Exception as e:
-            processing_time = time.time() - start_time
-            return {
-                'application_id': application.application_id,
-                'client_name': application.client_name,
-                'error': str(e),
-                'processing_time': processing_time,
-                'success': False
-            }
+            for application, outcome in zip(batch, outcomes)
+        ]
 
     async def run_concurrent_test(self):
         """
@@ -120,48 +220,115 @@ class ConcurrentProcessingTester:
         self.start_time = time.time()
         
         # Generate all applications upfront
-        applications = [
-            self.generator.generate_application(i)
-            for i in range(self.num_applications)
-        ]
+        applications = self.generator.generate_batch(self.num_applications)
+        
+        # Results are stored by input position; progress is printed about 20 times
+        self.results = [None] * self.num_applications
+        progress_step = max(1, self.num_applications // 20)
+        processed = 0
         
-        # Process applications in batches for better performance
-        for i in range(0, len(applications), self.batch_size):
-            batch = applications[i:i + self.batch_size]
-            tasks = [self.process_application(app) for app in batch]
-            batch_results = await asyncio.gather(*tasks)
-            self.results.extend(batch_results)
-            
-            # Print progress
-            processed = len(self.results)
-            print(f"Processed {processed}/{self.num_applications} applications...")
+        if self.service_batch:
+            # Process applications in batches, one service task per batch
+            for i in range(0, len(applications), self.batch_size):
+                batch = applications[i:i + self.batch_size]
+                self.results[i:i + len(batch)] = await self.process_batch_in_service(batch)
+                
+                # Print progress whenever the batch crosses a progress step
+                previous, processed = processed, processed + len(batch)
+                if processed // progress_step > previous // progress_step or processed == self.num_applications:
+                    print(f"Processed {processed}/{self.num_applications} applications...")
+        else:
+            # Price all agreements with one task, then keep batch_size applications
+            # in flight at all times instead of waiting for each batch's slowest one
+            agreements = await self.processor.prepare_agreements(applications)
+            if self.pool is not None:
+                await self._run_in_workers(applications, agreements, progress_step)
+            else:
+                semaphore = asyncio.Semaphore(self.batch_size)
+                
+                async def _bounded(index: int, application: LoanApplication, agreement: Dict[str, Any]):
+                    async with semaphore:
+                        return index, await self.process_application(application, agreement)
+                
+                tasks = [
+                    asyncio.create_task(_bounded(index, app, agreement))
+                    for index, (app, agreement) in enumerate(zip(applications, agreements))
+                ]
+                for next_result in asyncio.as_completed(tasks):
+                    index, result = await next_result
+                    self.results[index] = result
+                    
+                    # Print progress
+                    processed += 1
+                    if processed % progress_step == 0 or processed == self.num_applications:
+                        print(f"Processed {processed}/{self.num_applications} applications...")
         
         self.end_time = time.time()
         
         # Generate and save test report
         self._generate_test_report()
 
+    async def _run_in_workers(self, applications: List[LoanApplication],
+                              agreements: List[Dict[str, Any]], progress_step: int):
+        """
+        Runs one slice of applications per worker process. The batch_size
+        applications in flight are shared out between the workers.
+        """
+        loop = asyncio.get_running_loop()
+        slice_size = -(-len(applications) // self.workers)
+        concurrency = -(-self.batch_size // self.workers)
+        
+        async def _slice(start: int):
+            end = start + slice_size
+            return start, await loop.run_in_executor(
+                self.pool, _process_slice,
+                self.processor, applications[start:end], agreements[start:end], concurrency
+            )
+        
+        processed = 0
+        try:
+            for next_slice in asyncio.as_completed([_slice(start) for start in range(0, len(applications), slice_size)]):
+                start, results = await next_slice
+                self.results[start:start + len(results)] = results
+                
+                # Print progress whenever the slice crosses a progress step
+                previous, processed = processed, processed + len(results)
+                if processed // progress_step > previous // progress_step or processed == self.num_applications:
+                    print(f"Processed {processed}/{self.num_applications} applications...")
+        finally:
+            self.pool.shutdown()
+
     def _generate_test_report(self):
         """
         Creates a detailed report of the concurrent processing test results.
         Includes statistics and performance metrics.
         """
         total_time = self.end_time - self.start_time
-        successful_applications = [r for r in self.results if r.get('success', False)]
-        failed_applications = [r for r in self.results if not r.get('success', False)]
         
-        # Calculate statistics
-        processing_times = [r['processing_time'] for r in self.results]
-        avg_processing_time = sum(processing_times) / len(processing_times)
-        max_processing_time = max(processing_times)
-        min_processing_time = min(processing_times)
+        # Calculate statistics in a single pass over the results
+        successful_count = failed_count = 0
+        total_processing_time = 0.0
+        max_processing_time = -math.inf
+        min_processing_time = math.inf
+        for r in self.results:
+            t = r['processing_time']
+            total_processing_time += t
+            if t > max_processing_time:
+                max_processing_time = t
+            if t < min_processing_time:
+                min_processing_time = t
+            if r.get('success', False):
+                successful_count += 1
+            else:
+                failed_count += 1
+        avg_processing_time = total_processing_time / len(self.results)
         
         # Create report
         report = {
             'test_summary': {
                 'total_applications': self.num_applications,
-                'successful_applications': len(successful_applications),
-                'failed_applications': len(failed_applications),
+                'successful_applications': successful_count,
+                'failed_applications': failed_count,
                 'total_processing_time': total_time,
                 'average_processing_time': avg_processing_time,
                 'max_processing_time': max_processing_time,
@@ -176,15 +343,15 @@ class ConcurrentProcessingTester:
         report_path = Path(f'test_reports/concurrent_test_{timestamp}.json')
         report_path.parent.mkdir(exist_ok=True)
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        with open(report_path, 'wb') as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
         
         # Print summary
         print("\nConcurrent Processing Test Results:")
         print("="*50)
         print(f"Total Applications Processed: {self.num_applications}")
-        print(f"Successful Applications: {len(successful_applications)}")
-        print(f"Failed Applications: {len(failed_applications)}")
+        print(f"Successful Applications: {successful_count}")
+        print(f"Failed Applications: {failed_count}")
         print(f"Total Processing Time: {total_time:.2f} seconds")
         print(f"Average Processing Time: {avg_processing_time:.2f} seconds")
         print(f"Maximum Processing Time: {max_processing_time:.2f} seconds")
@@ -200,10 +367,11 @@ async def main():
     # Number of concurrent applications to process
     num_applications = 100  # Increased number of applications
     batch_size = 50  # Process 50 applications at a time
+    service_batch = False  # Process each batch with one process_loan_batch task
     
     # Create and run the tester
-    tester = ConcurrentProcessingTester(num_applications, batch_size)
+    tester = ConcurrentProcessingTester(num_applications, batch_size, service_batch)
     await tester.run_concurrent_test()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    run_async(main())
\ No newline at end of file
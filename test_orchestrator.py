@@ -0,0 +1,146 @@
+# test_orchestrator.py
+from decimal import Decimal
+import math
+from services.models import LoanApplication, LoanStatus
+from services.orchestrator import (
+    LoanProcessOrchestrator, IncompleteApplicationError,
+    process_loan_batch, ensure_complete, combine_loan_results, prepare_agreement_if_eligible
+)
+from services.completeness import verify_completion
+from services.eligibility import evaluate_eligibility
+from services.reimbursement import prepare_reimbursement_agreement, prepare_reimbursement_batch
+
+def make_application(**overrides):
+    """Helper function building a complete, eligible application"""
+    fields = {
+        'client_name': 'Alexandre Dubois',
+        'address': '25 Avenue Montaigne, 75008 Paris, France',
+        'email': 'alexandre.dubois@email.com',
+        'phone': '+33 6 12 34 56 78',
+        'loan_amount': Decimal('750000.00'),
+        'loan_duration_years': 25,
+        'property_description': 'Appartement de luxe de 250m²',
+        'monthly_income': Decimal('35000.00'),
+        'monthly_expenses': Decimal('8000.00')
+    }
+    fields.update(overrides)
+    return LoanApplication(**fields)
+
+def test_batch_outcomes_follow_input_order():
+    """Test incomplete, ineligible and eligible applications in one batch"""
+    applications = [
+        make_application(email=''),                          # Incomplete
+        make_application(monthly_expenses=Decimal('30000')),  # DTI ratio too high
+        make_application(),                                   # Eligible
+        make_application(loan_amount=None)                    # Incomplete
+    ]
+    loans = [LoanProcessOrchestrator._batch_loan_data(application) for application in applications]
+
+    print("\nTesting batch outcomes:")
+    outcomes = process_loan_batch.apply(args=[loans]).get()
+    print(f"Statuses: {[outcome['status'] for outcome in outcomes]}")
+
+    assert [outcome['application_id'] for outcome in outcomes] == [app.application_id for app in applications]
+    assert [outcome['status'] for outcome in outcomes] == [
+        LoanStatus.INCOMPLETE.label,
+        LoanStatus.REJECTED.label,
+        LoanStatus.PENDING_AGREEMENT.label,
+        LoanStatus.INCOMPLETE.label
+    ]
+    assert 'agreement' not in outcomes[1]
+    assert outcomes[2]['agreement']['application_id'] == applications[2].application_id
+
+def test_batch_payments_match_single_agreement():
+    """Test that batch pricing matches the single-loan agreement task"""
+    loans = [
+        {'application_id': f'TEST_BATCH_{i:03d}', 'loan_amount': amount, 'loan_duration_years': years}
+        for i, (amount, years) in enumerate([(200000.0, 15), (450000.0, 20), (750000.0, 25), (800000.0, 30)])
+    ]
+
+    print("\nTesting batch payments:")
+    batch = prepare_reimbursement_batch.apply(args=[loans]).get()
+    for loan_data, agreement in zip(loans, batch):
+        single = prepare_reimbursement_agreement.apply(args=[loan_data]).get()
+        print(f"{loan_data['application_id']}: {agreement['agreement_details']['monthly_payment']:.2f}")
+        assert agreement['application_id'] == loan_data['application_id']
+        for key, value in single['agreement_details'].items():
+            if isinstance(value, float):
+                assert math.isclose(agreement['agreement_details'][key], value, rel_tol=1e-12)
+            else:
+                assert agreement['agreement_details'][key] == value
+
+def test_cents_round_trip():
+    """Test that batch amounts travel as exact cents and are priced in cents"""
+    application = make_application(loan_amount=Decimal('612345.67'), monthly_income=Decimal('20000.10'))
+    loan_data = LoanProcessOrchestrator._batch_loan_data(application)
+    assert loan_data['loan_amount'] == 61234567
+    assert loan_data['monthly_income'] == 2000010
+    assert loan_data['monthly_expenses'] == 800000
+
+    print("\nTesting cents round trip:")
+    details = prepare_reimbursement_batch.apply(args=[[loan_data]], kwargs={'in_cents': True}).get()[0]['agreement_details']
+    euros = prepare_reimbursement_agreement.apply(args=[{
+        'application_id': application.application_id,
+        'loan_amount': float(application.loan_amount),
+        'loan_duration_years': application.loan_duration_years
+    }]).get()['agreement_details']
+    print(f"Monthly payment: {details['monthly_payment_cents'] / 100:.2f} (euros: {euros['monthly_payment']:.4f})")
+
+    assert details['loan_amount_cents'] == 61234567
+    assert details['monthly_payment_cents'] == round(euros['monthly_payment'] * 100)
+    assert details['total_repayment_cents'] == details['monthly_payment_cents'] * details['total_payments']
+
+def test_ensure_complete_gates_the_workflow():
+    """Test that only complete applications pass on to the parallel steps"""
+    loan_data = LoanProcessOrchestrator._loan_data(make_application())
+    completeness = verify_completion.apply(args=[loan_data]).get()
+    assert ensure_complete.apply(args=[completeness, loan_data]).get() == loan_data
+
+    incomplete_data = {**loan_data, 'email': ''}
+    completeness = verify_completion.apply(args=[incomplete_data]).get()
+    try:
+        ensure_complete.apply(args=[completeness, incomplete_data]).get()
+    except IncompleteApplicationError as e:
+        print(f"\nIncomplete application stopped: {e}")
+    else:
+        raise AssertionError("ensure_complete accepted an incomplete application")
+
+def test_combine_loan_results():
+    """Test merging the eligibility and agreement branches"""
+    loan_data = LoanProcessOrchestrator._loan_data(make_application())
+    agreement = prepare_reimbursement_agreement.apply(args=[loan_data]).get()
+
+    eligibility = evaluate_eligibility.apply(args=[loan_data]).get()
+    result = combine_loan_results.apply(args=[[eligibility, agreement]]).get()
+    assert result['status'] == LoanStatus.PENDING_AGREEMENT.label
+    assert result['agreement'] == agreement
+
+    ineligible = evaluate_eligibility.apply(args=[{**loan_data, 'monthly_expenses': 30000.0}]).get()
+    result = combine_loan_results.apply(args=[[ineligible, agreement]]).get()
+    assert result['status'] == LoanStatus.REJECTED.label
+    assert result['agreement'] is None
+
+def test_sequential_agreement_step():
+    """Test the agreement step used instead of the chord on backends without chords"""
+    loan_data = LoanProcessOrchestrator._loan_data(make_application())
+
+    eligibility = evaluate_eligibility.apply(args=[loan_data]).get()
+    eligible, agreement = prepare_agreement_if_eligible.apply(args=[eligibility, loan_data]).get()
+    assert eligible == eligibility
+    assert agreement == prepare_reimbursement_agreement.apply(args=[loan_data]).get()
+
+    ineligible = evaluate_eligibility.apply(args=[{**loan_data, 'monthly_expenses': 30000.0}]).get()
+    pair = prepare_agreement_if_eligible.apply(args=[ineligible, loan_data]).get()
+    assert pair == [ineligible, None]
+    assert combine_loan_results.apply(args=[pair]).get()['status'] == LoanStatus.REJECTED.label
+
+if __name__ == "__main__":
+    print("Starting orchestrator tests...")
+
+    # Run all tests
+    test_batch_outcomes_follow_input_order()
+    test_batch_payments_match_single_agreement()
+    test_cents_round_trip()
+    test_ensure_complete_gates_the_workflow()
+    test_combine_loan_results()
+    test_sequential_agreement_step()
@@ -1,7 +1,6 @@
 import asyncio
-import json
 from decimal import Decimal
-from main import LoanApplicationProcessor
+from main import LoanApplicationProcessor, _load_reimbursement_rules
 from services.models import LoanApplication
 
 async def test_reimbursement_rules():
@@ -77,9 +76,9 @@ async def test_reimbursement_rules():
         }
     ]
 
-    # Load reimbursement rules for verification
-    with open('reimbursement_rules.json', 'r') as f:
-        rules = json.load(f)
+    # Load reimbursement rules for verification (cached, shared with the processor)
+    rules = _load_reimbursement_rules()
+    processor = LoanApplicationProcessor()
 
     print("\nStarting Loan Application Test Cases")
     print("=" * 50)
@@ -89,7 +88,6 @@ async def test_reimbursement_rules():
         print("-" * 30)
 
         # Process the loan application
-        processor = LoanApplicationProcessor()
         result = await processor.process_loan_application(test_case['application'])
 
         # Verify results